@@ -1,13 +1,51 @@
 #!/usr/bin/env python3
 
-import subprocess
-import sys
+import json
 import os
+import re
 import signal
-try:
-    import libtmux
-except ImportError:
-    libtmux = None
+import stat
+import sys
+
+# Deletes every digit and dot; a version string translates to '' if it contains nothing else
+_VERSION_STRIP = str.maketrans('', '', '0123456789.')
+
+# Full dotted version at the start of an alias target, e.g. 'v18.20.8' -> '18.20.8'
+_VER_RE = re.compile(r'^\s*v?(\d+(?:\.\d+)+)\b')
+
+def _is_version(ver_str):
+    """True for dotted numeric strings like '18.20.8' (no empty parts such as '18.' or '1..2')."""
+    return ('.' in ver_str and not ver_str.translate(_VERSION_STRIP)
+            and '..' not in ver_str and ver_str[0] != '.' and ver_str[-1] != '.')
+
+# Above this many versions, bin/node probes go through a thread pool
+_PARALLEL_PROBE_THRESHOLD = 8
+_PROBE_WORKERS = 16
+
+def _is_node_binary(path):
+    """True if path is a regular file; os.stat follows symlinks, so one call covers both."""
+    try:
+        return stat.S_ISREG(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+def _vers_key(v):
+    """Sort key for a version string: '18.20.8' -> (18, 20, 8)."""
+    # Fast path for the usual X.Y.Z shape: no split list, no map object
+    a, _, rest = v.partition('.')
+    b, _, c = rest.partition('.')
+    try:
+        return (int(a), int(b), int(c) if c else 0)
+    except ValueError:
+        pass
+    try:
+        return tuple(map(int, v.split('.')))
+    except ValueError:
+        return (0, 0, 0)
+
+def _handle_sigint(signum, frame):
+    print("\nGraceful shutdown. Bye!")
+    sys.exit(0)
 
 class NvmManager:
     def __init__(self):
@@ -15,67 +53,152 @@ class NvmManager:
         self.nvm_dir = os.environ.get('NVM_DIR') or os.path.expanduser('~/.nvm')
         if not os.path.isdir(self.nvm_dir):
             print("Warning: Could not locate NVM directory. Ensure nvm is installed and NVM_DIR is set.", file=sys.stderr)
+        self._versions_dir = os.path.join(self.nvm_dir, 'versions', 'node')
+        self._sep = os.sep
+        cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+        self._cache_file = os.path.join(cache_home, 'nodepicker', 'versions.json')
+        # NODEPICKER_NO_CACHE=1 forces a fresh scan (the result is still written back)
+        self._skip_disk_cache = bool(os.environ.get('NODEPICKER_NO_CACHE'))
+        self._installed_versions = None
 
-    def _run_nvm(self, nvm_subcommand):
-        """Run an nvm subcommand (string) and return (stdout, stderr, returncode)."""
-        command = f'source "{self.nvm_dir}/nvm.sh" >/dev/null 2>&1 && {nvm_subcommand}'
-        result = subprocess.run(['bash', '-lc', command], capture_output=True, text=True)
-        return result.stdout, result.stderr, result.returncode
+    def _read_default_alias(self):
+        """Resolve $NVM_DIR/alias/default to a version string (without leading 'v'), or None.
+
+        Aliases may point at other aliases (e.g. default -> lts/hydrogen), so follow a few hops.
+        """
+        alias_dir = os.path.join(self.nvm_dir, 'alias')
+        name = 'default'
+        for _ in range(5):
+            try:
+                with open(os.path.join(alias_dir, name)) as f:
+                    target = f.read().strip()
+            except OSError:
+                return None
+            m = _VER_RE.match(target)
+            if m:
+                return m.group(1)
+            if not target or target[0].isdigit():
+                # empty, or a partial version like '18' that nvm resolves itself
+                return None
+            name = target
+        return None
 
     def get_installed_versions(self, *_):
         """Return a sorted list of installed Node.js versions (only truly installed ones).
 
         Strategy:
-        1. Prefer directory scan of $NVM_DIR/versions/node/* (most reliable)
-        2. Fallback to parsing `nvm ls --no-colors` if directory scan empty
+        1. Prefer directory scan of $NVM_DIR/versions/node/* (most reliable), cached on disk
+           until the directory's mtime changes (nvm install/uninstall touches it)
+        2. Fallback to resolving $NVM_DIR/alias/default if the directory scan fails
+
+        The disk cache only tracks the mtime of versions/node itself, so adding or removing
+        bin/node inside an existing version dir (e.g. an in-progress `nvm install -s`) is not
+        noticed; set NODEPICKER_NO_CACHE=1 or call refresh_installed_versions() to rescan.
+        The result is memoized on the instance.
         """
-        versions_dir = os.path.join(self.nvm_dir, 'versions', 'node')
-        candidates = []
-        if os.path.isdir(versions_dir):
+        if self._installed_versions is not None:
+            return self._installed_versions
+        versions_dir = self._versions_dir
+        sep = self._sep
+        try:
+            dir_st = os.stat(versions_dir)
+        except OSError:
+            dir_st = None
+        have_dir = dir_st is not None and stat.S_ISDIR(dir_st.st_mode)
+        if have_dir and not self._skip_disk_cache:
+            cached = self._load_cached_versions(dir_st.st_mtime_ns)
+            if cached is not None:
+                self._installed_versions = cached
+                return cached
+        candidates = set()
+        pending = []
+        scan_ok = False
+        if have_dir:
             try:
-                for name in os.listdir(versions_dir):
-                    full = os.path.join(versions_dir, name)
-                    if not os.path.isdir(full):
-                        continue
-                    # names typically like v18.20.8 or v16.20.2
-                    if name.startswith('v'):
-                        ver_str = name[1:]
-                    else:
-                        ver_str = name
-                    if all(part.isdigit() for part in ver_str.split('.')):
-                        # ensure node binary exists
-                        if os.path.isfile(os.path.join(full, 'bin', 'node')):
-                            candidates.append(ver_str)
+                with os.scandir(versions_dir) as it:
+                    for entry in it:
+                        # is_dir() reuses d_type (Linux) / find data (Windows); follows symlinked version dirs
+                        if not entry.is_dir():
+                            continue
+                        name = entry.name
+                        # names typically like v18.20.8 or v16.20.2
+                        if name.startswith('v'):
+                            ver_str = name[1:]
+                        else:
+                            ver_str = name
+                        if _is_version(ver_str):
+                            pending.append((ver_str, f"{entry.path}{sep}bin{sep}node"))
+                # ensure node binary exists; probe in parallel when there are enough to hide
+                # per-stat latency (e.g. $NVM_DIR on NFS/SMB)
+                paths = [p for _, p in pending]
+                if len(pending) > _PARALLEL_PROBE_THRESHOLD:
+                    from concurrent.futures import ThreadPoolExecutor
+                    with ThreadPoolExecutor(max_workers=_PROBE_WORKERS) as ex:
+                        found = list(ex.map(_is_node_binary, paths))
+                else:
+                    found = [_is_node_binary(p) for p in paths]
+                candidates = {ver for (ver, _), ok in zip(pending, found) if ok}
+                scan_ok = True
             except Exception as e:
                 print(f"Warning: could not scan versions directory: {e}", file=sys.stderr)
 
-        if not candidates:
-            # Fallback to parsing nvm ls (may include non-installed but we try to filter)
-            out, err, code = self._run_nvm('nvm ls --no-colors')
-            if code == 0:
-                for line in out.splitlines():
-                    line = line.strip()
-                    if not line or '->' in line and not line.startswith('v'):
-                        # skip alias lines like 'default -> v18.20.0'
-                        pass
-                    # lines for installed versions usually start with optional arrow/asterisk then version
-                    # Accept tokens that are standalone like vX.Y.Z at line start
-                    if line.startswith('v') and all(c.isdigit() or c == '.' for c in line[1:].split()[0]):
-                        token = line.split()[0]
-                        ver = token[1:]
-                        if all(part.isdigit() for part in ver.split('.')):
-                            candidates.append(ver)
-            else:
-                if err:
-                    print(err.strip(), file=sys.stderr)
+        if not have_dir:
+            print(f"Error: NVM versions directory not found: {versions_dir}", file=sys.stderr)
+        elif not scan_ok:
+            # Fallback when listing versions/node failed (e.g. no read permission on the dir):
+            # resolve $NVM_DIR/alias/default and probe that one version directly. After a
+            # successful scan this would only re-check a path the scan already rejected.
+            ver = self._read_default_alias()
+            if ver and _is_node_binary(os.path.join(versions_dir, f"v{ver}", 'bin', 'node')):
+                candidates.add(ver)
+
+        # candidates is already deduplicated; sorted() computes each key once
+        self._installed_versions = sorted(candidates, key=_vers_key)
+        # Never cache a failed or empty scan: a later fix (e.g. chmod) would not bump the mtime
+        if scan_ok and self._installed_versions:
+            self._save_cached_versions(self._installed_versions, dir_st.st_mtime_ns)
+        return self._installed_versions
 
-        # Deduplicate & version sort
-        def vers_key(v):
+    def _load_cached_versions(self, mtime_ns):
+        """Return the on-disk cached version list if it matches versions_dir and its mtime, else None."""
+        try:
+            with open(self._cache_file) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict):
+            return None
+        if data.get('versions_dir') != self._versions_dir or data.get('mtime_ns') != mtime_ns:
+            return None
+        versions = data.get('versions')
+        if not isinstance(versions, list):
+            return None
+        if not all(isinstance(v, str) and _is_version(v) for v in versions):
+            return None
+        return versions
+
+    def _save_cached_versions(self, versions, mtime_ns):
+        """Atomically write the version list to the cache file; failures are silently ignored."""
+        import tempfile  # only needed on a cache miss
+        cache_dir = os.path.dirname(self._cache_file)
+        data = {'versions_dir': self._versions_dir, 'mtime_ns': mtime_ns, 'versions': versions}
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='.versions-', suffix='.tmp')
             try:
-                return tuple(int(x) for x in v.split('.'))
-            except ValueError:
-                return (0,)
-        return sorted(set(candidates), key=vers_key)
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self._cache_file)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass
+
+    def refresh_installed_versions(self):
+        """Drop the memoized version list so the next lookup rescans, bypassing the disk cache."""
+        self._installed_versions = None
+        self._skip_disk_cache = True
 
     def set_node_version(self, version, default=False):
         if default:
@@ -86,18 +209,27 @@ class NvmManager:
 
 class TmuxManager:
     def __init__(self):
-        self.is_tmux = 'TMUX' in os.environ
-        if not self.is_tmux:
-            print("This script must be run inside a tmux session.", file=sys.stderr)
-            sys.exit(1)
-        if libtmux is None:
+        self.require_tmux()
+        # Imported here, and TmuxManager itself is built on first use by Cli,
+        # so the menu (and 'q') never pays for libtmux or a tmux Server
+        try:
+            import libtmux
+        except ImportError:
             print("Missing 'libtmux' module. Please install it with 'pip install libtmux'.", file=sys.stderr)
             sys.exit(1)
-        self.server = libtmux.Server()
-        self.session = self._get_current_session()
+        self._libtmux = libtmux
+        self.server = self._libtmux.Server()
         self.pane = self._get_current_pane()
 
+    @staticmethod
+    def require_tmux():
+        """Exit unless running inside tmux (env check only, no libtmux)."""
+        if 'TMUX' not in os.environ:
+            print("This script must be run inside a tmux session.", file=sys.stderr)
+            sys.exit(1)
+
     def _get_current_session(self):
+        # Only reached when TMUX_PANE is unset (see _get_current_pane)
         sessions = self.server.list_sessions()
         if not sessions:
             print("No tmux sessions found.", file=sys.stderr)
@@ -113,11 +245,10 @@ class TmuxManager:
     def _get_current_pane(self):
         pane_id = os.environ.get('TMUX_PANE')
         if pane_id:
-            for window in self.session.windows:
-                for pane in window.panes:
-                    if pane.get('pane_id') == pane_id:
-                        return pane
-        return self.session.attached_window.attached_pane
+            # TMUX_PANE uniquely identifies the pane; a thin wrapper is enough for send_keys
+            return self._libtmux.Pane(server=self.server, pane_id=pane_id)
+        # Only without TMUX_PANE do we need the session (extra tmux calls)
+        return self._get_current_session().attached_window.attached_pane
 
     def send_command(self, command, enter=True):
         """Send a command to the active pane.
@@ -138,19 +269,20 @@ class TmuxManager:
                 # Just type without executing
                 self.pane.send_keys(command)
 
-class SignalHandler:
-    def __init__(self):
-        signal.signal(signal.SIGINT, self.handle_sigint)
-
-    def handle_sigint(self, signum, frame):
-        print("\nGraceful shutdown. Bye!")
-        sys.exit(0)
+    def send_commands(self, commands, enter=True):
+        """Send several commands to the active pane as one `cmd1 && cmd2` line (single send-keys)."""
+        self.send_command(' && '.join(commands), enter=enter)
 
 class Cli:
-    def __init__(self, nvm_manager, tmux_manager):
+    def __init__(self, nvm_manager, tmux_manager=None):
         self.nvm_manager = nvm_manager
         self.tmux_manager = tmux_manager
 
+    def _get_tmux_manager(self):
+        if self.tmux_manager is None:
+            self.tmux_manager = TmuxManager()
+        return self.tmux_manager
+
     def main_menu(self):
         while True:
             print("\nSelect an action:")
@@ -178,9 +310,6 @@ class Cli:
         if not versions:
             print("No Node.js versions detected. Install one with 'nvm install <version>'.", file=sys.stderr)
             return
-        print("\nInstalled Node.js versions:")
-        for idx, v in enumerate(versions, 1):
-            print(f"{idx}. {v}")
         chosen = self.prompt_for_version(versions)
         if chosen not in versions:
             print(f"Selected version '{chosen}' not among installed versions.", file=sys.stderr)
@@ -190,36 +319,77 @@ class Cli:
             print(f"Setting default Node.js version to {chosen} and applying now...")
         else:
             print(f"Switching Node.js version for this session to {chosen}...")
-        for cmd in commands:
-            self.tmux_manager.send_command(cmd)
+        self._get_tmux_manager().send_commands(commands)
         if default:
             print("Default updated.")
         else:
             print("Session updated.")
 
     def prompt_for_version(self, versions):
-        while True:
-            try:
-                choice = input("Enter the number of the version you want to use (or 'q' to quit): ")
+        """Show the version menu once and read a choice (tab completes versions).
+
+        Plain digits always mean a list number. Anything containing a '.' or starting with 'v'
+        is a version prefix (e.g. '18.' or 'v20') and must match exactly one installed version.
+        """
+        menu = '\n'.join(f"{idx}. {v}" for idx, v in enumerate(versions, 1))
+        sys.stdout.write(f"\nInstalled Node.js versions:\n{menu}\n")
+        sys.stdout.flush()
+        try:
+            import readline
+        except ImportError:
+            readline = None
+        if readline is not None:
+            # Python's readline module binds Tab to plain insert; enable completion only while prompting
+            if getattr(readline, 'backend', None) == 'editline' or 'libedit' in (readline.__doc__ or ''):
+                bind_tab, unbind_tab = 'bind ^I rl_complete', 'bind ^I ed-insert'
+            else:
+                bind_tab, unbind_tab = 'tab: complete', 'tab: self-insert'
+            previous_completer = readline.get_completer()
+            readline.set_completer(lambda text, state: (self._complete_version(versions, text) + [None])[state])
+            readline.parse_and_bind(bind_tab)
+        try:
+            while True:
+                choice = input("Enter a list number, or a version prefix like '18.' or 'v20' (or 'q' to quit): ").strip()
                 if choice.lower() == 'q':
                     print("Exiting.")
                     sys.exit(0)
-                
-                choice_index = int(choice) - 1
-                if 0 <= choice_index < len(versions):
-                    return versions[choice_index]
-                
-                print("Invalid choice. Please enter a number from the list.")
-            except ValueError:
-                print("Invalid input. Please enter a valid number.")
+
+                if choice.isdecimal():
+                    if 0 < int(choice) <= len(versions):
+                        return versions[int(choice) - 1]
+                    print("Invalid choice. Please enter a number from the list.")
+                    continue
+
+                if choice.startswith('v') or '.' in choice:
+                    prefix = choice[1:] if choice.startswith('v') else choice
+                    if prefix in versions:
+                        return prefix
+                    matches = [v for v in versions if v.startswith(prefix)] if prefix else []
+                    if len(matches) == 1:
+                        return matches[0]
+                    if matches:
+                        print(f"Ambiguous version '{choice}': {', '.join(matches)}")
+                        continue
+
+                print("Invalid input. Please enter a number or version from the list.")
+        finally:
+            if readline is not None:
+                readline.parse_and_bind(unbind_tab)
+                readline.set_completer(previous_completer)
+
+    @staticmethod
+    def _complete_version(versions, text):
+        if text.startswith('v'):
+            return [f"v{v}" for v in versions if v.startswith(text[1:])]
+        return [v for v in versions if v.startswith(text)]
 
 class App:
     def __init__(self):
-        self.signal_handler = SignalHandler()
+        signal.signal(signal.SIGINT, _handle_sigint)
         print("--- NVM Node Version Picker ---")
+        TmuxManager.require_tmux()
         self.nvm_manager = NvmManager()
-        self.tmux_manager = TmuxManager()
-        self.cli = Cli(self.nvm_manager, self.tmux_manager)
+        self.cli = Cli(self.nvm_manager)
 
     def run(self):
         self.cli.main_menu()